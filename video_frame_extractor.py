@@ -1,38 +1,91 @@
 import sys
 import os
+import errno
+import io
+import multiprocessing
+import queue
+import tarfile
+import threading
+import time
+import zipfile
 from PyQt5.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, 
                              QHBoxLayout, QLabel, QPushButton, QFileDialog, 
                              QSpinBox, QDoubleSpinBox, QGroupBox, QMessageBox,
-                             QProgressBar, QLineEdit, QFrame)
-from PyQt5.QtCore import Qt, QTimer, pyqtSignal, QThread
-from PyQt5.QtGui import QImage, QPixmap, QPainter, QPen, QColor
+                             QProgressBar, QLineEdit, QFrame, QComboBox)
+from PyQt5.QtCore import Qt, QTimer, pyqtSignal, QThread, QRect
+from PyQt5.QtGui import QImage, QPixmap, QPainter, QPen, QColor, QRegion
 import cv2
 import numpy as np
 from datetime import timedelta
 
+try:
+    import av
+except ImportError:
+    av = None
+
+try:
+    import ffmpegcv
+except (ImportError, RuntimeError):  # RuntimeError: ffmpeg binary not found
+    ffmpegcv = None
+
+try:
+    import liburing
+except ImportError:
+    liburing = None
+
 
 class RectangleSelector(QLabel):
     """Widget for selecting rectangular region on video frame"""
     
     roi_selected = pyqtSignal(int, int, int, int)  # x, y, width, height
     
+    PEN_WIDTH = 2
+    
     def __init__(self, parent=None):
         super().__init__(parent)
         self.start_point = None
         self.end_point = None
         self.drawing = False
         self.roi = None
+        self._last_rect = QRect()  # selection outline as last painted
         
     def mousePressEvent(self, event):
         if event.button() == Qt.LeftButton:
+            # Erase the previous selection before starting a new one
+            self.update(self._outline_region(self._selection_rect()))
             self.drawing = True
             self.start_point = event.pos()
             self.end_point = event.pos()
+            self._last_rect = QRect()
             
     def mouseMoveEvent(self, event):
         if self.drawing:
             self.end_point = event.pos()
-            self.update()
+            # Only the old and new outlines change while dragging, so repaint
+            # just those bands instead of re-blitting the whole pixmap
+            rect = self._selection_rect()
+            self.update(self._outline_region(self._last_rect).united(self._outline_region(rect)))
+            self._last_rect = rect
+            
+    def _selection_rect(self):
+        """Rectangle paintEvent() outlines, clipped to the widget"""
+        if not (self.start_point and self.end_point):
+            return QRect()
+        x, y, width, height = self._clamp_rect(
+            self.start_point.x(), self.start_point.y(),
+            self.end_point.x(), self.end_point.y(),
+            self.width(), self.height()
+        )
+        # drawRect() covers both edges, one pixel past width and height
+        return QRect(x, y, width + 1, height + 1)
+        
+    def _outline_region(self, rect):
+        """Region covered by the selection pen when drawing rect"""
+        if rect.isEmpty():
+            return QRegion()
+        pad = self.PEN_WIDTH
+        outer = QRegion(rect.adjusted(-pad, -pad, pad, pad))
+        return outer.subtracted(QRegion(rect.adjusted(pad, pad, -pad, -pad)))
             
     def mouseReleaseEvent(self, event):
         if event.button() == Qt.LeftButton and self.drawing:
@@ -41,24 +94,25 @@ class RectangleSelector(QLabel):
             self.update()
             self._update_roi()
             
+    @staticmethod
+    def _clamp_rect(x1, y1, x2, y2, width, height):
+        """Return (x, y, w, h) of the rectangle spanned by two corners, clipped
+        to a width x height area. w or h is <= 0 if nothing is left inside."""
+        x = max(0, min(x1, x2))
+        y = max(0, min(y1, y2))
+        return x, y, min(max(x1, x2), width) - x, min(max(y1, y2), height) - y
+        
     def _update_roi(self):
         if self.start_point and self.end_point:
-            x1, y1 = self.start_point.x(), self.start_point.y()
-            x2, y2 = self.end_point.x(), self.end_point.y()
-            
-            x = min(x1, x2)
-            y = min(y1, y2)
-            width = abs(x2 - x1)
-            height = abs(y2 - y1)
-            
             # Get parent widget size for validation
             parent_size = self.parent().size() if self.parent() else self.size()
             
             # Clamp to widget bounds
-            x = max(0, min(x, parent_size.width() - 1))
-            y = max(0, min(y, parent_size.height() - 1))
-            width = min(width, parent_size.width() - x)
-            height = min(height, parent_size.height() - y)
+            x, y, width, height = self._clamp_rect(
+                self.start_point.x(), self.start_point.y(),
+                self.end_point.x(), self.end_point.y(),
+                parent_size.width(), parent_size.height()
+            )
             
             if width > 0 and height > 0:
                 self.roi = (x, y, width, height)
@@ -68,13 +122,14 @@ class RectangleSelector(QLabel):
         super().paintEvent(event)  # Draw the pixmap first
         if self.start_point and self.end_point:
             painter = QPainter(self)
-            pen = QPen(QColor(255, 0, 0), 2, Qt.SolidLine)
+            pen = QPen(QColor(255, 0, 0), self.PEN_WIDTH, Qt.SolidLine)
             painter.setPen(pen)
             
-            x = min(self.start_point.x(), self.end_point.x())
-            y = min(self.start_point.y(), self.end_point.y())
-            width = abs(self.end_point.x() - self.start_point.x())
-            height = abs(self.end_point.y() - self.start_point.y())
+            x, y, width, height = self._clamp_rect(
+                self.start_point.x(), self.start_point.y(),
+                self.end_point.x(), self.end_point.y(),
+                self.width(), self.height()
+            )
             
             painter.drawRect(x, y, width, height)
             painter.end()
@@ -83,9 +138,409 @@ class RectangleSelector(QLabel):
         self.start_point = None
         self.end_point = None
         self.roi = None
+        self._last_rect = QRect()
         self.update()
 
 
+class NvdecCapture:
+    """cv2.VideoCapture-like wrapper around ffmpegcv's NVDEC reader"""
+    
+    def __init__(self, video_path, crop_xywh=None):
+        self._reader = ffmpegcv.VideoCaptureNV(video_path, pix_fmt='bgr24', crop_xywh=crop_xywh)
+        self._frame = None
+        
+    def isOpened(self):
+        return self._reader.isOpened()
+        
+    def set(self, prop_id, value):
+        # Frames arrive as a pipe from ffmpeg, so there is no random access
+        return False
+        
+    def grab(self):
+        ret, self._frame = self._reader.read()
+        return ret
+        
+    def retrieve(self, image=None):
+        # ffmpegcv already hands out a fresh array, so image is not filled
+        return self._frame is not None, self._frame
+        
+    def release(self):
+        self._reader.release()
+
+
+class PyAVCapture:
+    """cv2.VideoCapture-like wrapper around a PyAV container
+    
+    Seeking jumps to the keyframe before the target and decodes forward to
+    the exact frame, so positions are deterministic unlike OpenCV's
+    CAP_PROP_POS_FRAMES, which varies by backend. With crop_xywh, retained
+    frames pass through an ffmpeg crop filter before the BGR conversion.
+    """
+    
+    def __init__(self, video_path, crop_xywh=None):
+        self._container = av.open(video_path)
+        self._stream = self._container.streams.video[0]
+        self._stream.thread_type = "AUTO"
+        self._graph = None
+        if crop_xywh:
+            x, y, w, h = crop_xywh
+            self._graph = av.filter.Graph()
+            source = self._graph.add_buffer(template=self._stream)
+            crop = self._graph.add("crop", f"w={w}:h={h}:x={x}:y={y}:exact=1")
+            sink = self._graph.add("buffersink")
+            source.link_to(crop)
+            crop.link_to(sink)
+            self._graph.configure()
+        rate = self._stream.average_rate or self._stream.guessed_rate
+        self._pts_per_frame = 1 / (rate * self._stream.time_base)
+        self._start_pts = self._stream.start_time or 0
+        self._frames = self._container.decode(self._stream)
+        self._frame = None
+        self._skip_before_pts = None  # set by a seek until the target is reached
+        
+    def isOpened(self):
+        return True
+        
+    def set(self, prop_id, value):
+        if prop_id != cv2.CAP_PROP_POS_FRAMES:
+            return False
+        # Half a frame early so pts rounding can never skip the target itself
+        target_pts = int(self._start_pts + (value - 0.5) * self._pts_per_frame)
+        self._container.seek(target_pts, stream=self._stream, any_frame=False, backward=True)
+        self._frames = self._container.decode(self._stream)
+        self._skip_before_pts = target_pts
+        return True
+        
+    def grab(self):
+        for frame in self._frames:
+            if self._skip_before_pts is not None and frame.pts is not None \
+                    and frame.pts < self._skip_before_pts:
+                continue
+            self._skip_before_pts = None
+            self._frame = frame
+            return True
+        self._frame = None
+        return False
+        
+    def retrieve(self, image=None):
+        # Only retained frames are converted to a BGR array. to_ndarray()
+        # always allocates, so image is not filled.
+        if self._frame is None:
+            return False, None
+        frame = self._frame
+        if self._graph is not None:
+            self._graph.push(frame)
+            frame = self._graph.pull()
+        return True, frame.to_ndarray(format='bgr24')
+        
+    def release(self):
+        self._container.close()
+
+
+class FileWriter:
+    """Writes each encoded frame to its own file with blocking writes"""
+    
+    def write(self, path, data):
+        with open(path, 'wb') as f:
+            f.write(data)
+            if hasattr(os, "posix_fadvise"):
+                # Keep frames that are never read back from pushing the video
+                # out of the page cache. On dirty pages DONTNEED only starts
+                # writeback without waiting, so the pages become reclaimable
+                f.flush()
+                os.posix_fadvise(f.fileno(), 0, 0, os.POSIX_FADV_DONTNEED)
+            
+    def close(self):
+        pass
+        
+    def __enter__(self):
+        return self
+        
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+class ZipWriter(FileWriter):
+    """Stores every encoded frame in a single uncompressed ZIP archive"""
+    
+    def __init__(self, archive_path):
+        # Frames are already compressed images, so deflating only burns CPU
+        self._zip = zipfile.ZipFile(archive_path, 'w', compression=zipfile.ZIP_STORED)
+        
+    def write(self, path, data):
+        self._zip.writestr(os.path.basename(path), data)
+        
+    def close(self):
+        self._zip.close()
+
+
+class TarWriter(FileWriter):
+    """Streams every encoded frame into a single TAR archive"""
+    
+    def __init__(self, archive_path):
+        # Stream mode never seeks back, so the file is written strictly in order
+        self._tar = tarfile.open(archive_path, 'w|')
+        
+    def write(self, path, data):
+        info = tarfile.TarInfo(os.path.basename(path))
+        info.size = len(data)
+        info.mtime = time.time()
+        self._tar.addfile(info, io.BytesIO(data))
+        
+    def close(self):
+        self._tar.close()
+
+
+class IoUringBatchEngine(FileWriter):
+    """Writes encoded frames through io_uring, submitting in batches.
+    
+    write() may be called from several threads. Each frame is queued as a
+    linked open, write, fadvise and close on one of the ring's registered
+    file slots, so a frame costs no syscalls of its own. Once every
+    `batch_size` frames the reaper thread is woken to submit them and drain
+    completions. Only the reaper submits: io_uring cancels a thread's
+    unfinished requests when it exits, and the threads calling write()
+    usually finish first. The liburing bindings hold the GIL while waiting
+    on the ring, so the reaper sleeps on an eventfd instead.
+    """
+    
+    _STOP = 0xFFFFFFFFFFFFFFFF  # user data of the NOP that stops the reaper
+    _CHAIN = 4  # SQEs per frame: open, write, fadvise, close
+    
+    def __init__(self, entries=64, batch_size=32):
+        self._ring = liburing.Ring()
+        liburing.io_uring_queue_init(entries * self._CHAIN, self._ring)
+        self._eventfd = os.eventfd(0)
+        try:
+            liburing.io_uring_register_eventfd(self._ring, self._eventfd)
+            # One registered slot per frame in flight (Linux 5.19+)
+            liburing.io_uring_register_files_sparse(self._ring, entries)
+        except OSError:
+            os.close(self._eventfd)
+            liburing.io_uring_queue_exit(self._ring)
+            raise
+        self._how = liburing.OpenHow(os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+        self._batch_size = batch_size
+        self._unsubmitted = 0
+        self._lock = threading.Lock()
+        # Never more frames in flight than `entries`, so get_sqe() can't fail
+        self._slots = threading.Semaphore(entries)
+        self._free = list(range(entries))
+        self._pending = {}  # slot -> (path, data); both must outlive the chain
+        self._error = None
+        self._reaper = threading.Thread(target=self._reap, daemon=True)
+        self._reaper.start()
+        
+    def write(self, path, data):
+        if self._error is not None:
+            raise self._error
+        self._slots.acquire()
+        with self._lock:
+            slot = self._free.pop()
+            self._pending[slot] = (path, data)
+            tag = slot * self._CHAIN
+            # A failed open cancels the rest of the chain; after that HARDLINK
+            # keeps it going so the slot is always closed
+            sqe = liburing.io_uring_get_sqe(self._ring)
+            liburing.io_uring_prep_openat2_direct(sqe, path, self._how, slot)
+            liburing.io_uring_sqe_set_flags(sqe, liburing.IOSQE_IO_LINK)
+            liburing.io_uring_sqe_set_data64(sqe, tag)
+            sqe = liburing.io_uring_get_sqe(self._ring)
+            liburing.io_uring_prep_write(sqe, slot, data, 0)
+            liburing.io_uring_sqe_set_flags(
+                sqe, liburing.IOSQE_FIXED_FILE | liburing.IOSQE_IO_HARDLINK)
+            liburing.io_uring_sqe_set_data64(sqe, tag + 1)
+            # Frames are never read back, so don't let them push the video
+            # itself out of the page cache; on dirty pages this only starts
+            # writeback, it doesn't wait for it
+            sqe = liburing.io_uring_get_sqe(self._ring)
+            liburing.io_uring_prep_fadvise(sqe, slot, 0, os.POSIX_FADV_DONTNEED, 0)
+            liburing.io_uring_sqe_set_flags(
+                sqe, liburing.IOSQE_FIXED_FILE | liburing.IOSQE_IO_HARDLINK)
+            liburing.io_uring_sqe_set_data64(sqe, tag + 2)
+            sqe = liburing.io_uring_get_sqe(self._ring)
+            liburing.io_uring_prep_close_direct(sqe, slot)
+            liburing.io_uring_sqe_set_data64(sqe, tag + 3)
+            self._unsubmitted += 1
+            if self._unsubmitted == self._batch_size:
+                os.eventfd_write(self._eventfd, 1)
+                
+    def close(self):
+        """Submit outstanding writes, wait for all of them and free the ring"""
+        self._slots.acquire()
+        with self._lock:
+            # IO_DRAIN holds the NOP back until every earlier chain completed
+            sqe = liburing.io_uring_get_sqe(self._ring)
+            liburing.io_uring_prep_nop(sqe)
+            liburing.io_uring_sqe_set_data64(sqe, self._STOP)
+            liburing.io_uring_sqe_set_flags(sqe, liburing.IOSQE_IO_DRAIN)
+            self._unsubmitted += 1
+        os.eventfd_write(self._eventfd, 1)
+        self._reaper.join()
+        liburing.io_uring_queue_exit(self._ring)
+        os.close(self._eventfd)
+        if self._error is not None:
+            raise self._error
+            
+    def _reap(self):
+        cqe = liburing.Cqe()
+        while True:
+            # Woken both by write()/close() and by the ring on completions
+            os.eventfd_read(self._eventfd)
+            with self._lock:
+                if self._unsubmitted:
+                    liburing.io_uring_submit(self._ring)
+                    self._unsubmitted = 0
+            while True:
+                try:
+                    liburing.io_uring_peek_cqe(self._ring, cqe)
+                except BlockingIOError:
+                    break
+                entry = cqe[0]
+                user_data = entry.user_data
+                try:
+                    res, error = entry.res, None  # the bindings raise on failure
+                except OSError as e:
+                    res, error = None, e
+                liburing.io_uring_cqe_seen(self._ring, entry)
+                if user_data == self._STOP:
+                    return
+                self._complete(user_data, res, error)
+                
+    def _complete(self, user_data, res, error):
+        slot, step = divmod(user_data, self._CHAIN)
+        if step == self._CHAIN - 1:
+            # The close (or its cancellation) is the chain's last completion
+            with self._lock:
+                path, data = self._pending.pop(slot)
+                self._free.append(slot)
+            self._slots.release()
+        else:
+            path, data = self._pending[slot]
+        if self._error is not None:
+            return
+        if error is not None:
+            if error.errno != errno.ECANCELED:  # already reported by the open
+                self._error = OSError(error.errno, error.strerror, path)
+        elif step == 1 and res < len(data):
+            # Short writes are rare on regular files and the chain has
+            # already closed the file, so report them like any other failure
+            self._error = OSError(errno.EIO, "Short write", path)
+
+
+class FrameBufferPool:
+    """Recycles a bounded set of frame arrays.
+    
+    acquire() allocates until `capacity` arrays exist and from then on blocks
+    until a consumer hands one back with release(), so steady-state decoding
+    allocates nothing. Arrays the pool did not allocate are ignored by
+    release(), which lets backends that always allocate share the same code.
+    """
+    
+    def __init__(self, capacity):
+        self._capacity = capacity
+        self._free = queue.Queue()
+        self._owned = set()  # ids of arrays allocated by this pool
+        
+    def acquire(self, shape):
+        if self._free.empty() and len(self._owned) < self._capacity:
+            buf = np.empty(shape, dtype=np.uint8)
+            self._owned.add(id(buf))
+            return buf
+        buf = self._free.get()
+        if buf.shape != tuple(shape):
+            # Only happens if the stream changes resolution midway
+            self._owned.discard(id(buf))
+            buf = np.empty(shape, dtype=np.uint8)
+            self._owned.add(id(buf))
+        return buf
+        
+    def release(self, buf):
+        if id(buf) in self._owned:
+            self._free.put(buf)
+
+
+class FramePipeline:
+    """Encodes and writes frames on background stages.
+    
+    put() hands a frame to a pool of encoder threads, which pass the encoded
+    bytes on to a single writer thread. Both hops are bounded queues, so
+    put() blocks once a later stage falls behind and memory stays flat;
+    throughput is set by the slowest stage rather than the sum of all three.
+    """
+    
+    def __init__(self, writer, ext, params, encoders=None, queue_size=16):
+        self._writer = writer
+        self._ext = ext
+        self._params = params
+        self._encode_queue = queue.Queue(maxsize=queue_size)
+        self._write_queue = queue.Queue(maxsize=queue_size)
+        self._error = None
+        self._encoders = [
+            threading.Thread(target=self._encode_stage, daemon=True)
+            for _ in range(encoders or os.cpu_count() or 1)
+        ]
+        # Enough buffers for a full encode queue, one per encoder and the
+        # frame being decoded; encoders hand each buffer back once encoded
+        self.buffers = FrameBufferPool(queue_size + len(self._encoders) + 1)
+        self._writer_thread = threading.Thread(target=self._write_stage, daemon=True)
+        for thread in self._encoders + [self._writer_thread]:
+            thread.start()
+            
+    def put(self, path, frame):
+        if self._error is not None:
+            raise self._error
+        self._encode_queue.put((path, frame))
+        
+    def close(self):
+        """Flush every queued frame to the writer and stop the stages"""
+        for _ in self._encoders:
+            self._encode_queue.put(None)
+        for thread in self._encoders:
+            thread.join()
+        self._write_queue.put(None)
+        self._writer_thread.join()
+        if self._error is not None:
+            raise self._error
+            
+    def __enter__(self):
+        return self
+        
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        
+    def _encode_stage(self):
+        # Stages keep draining after an error so upstream put() never blocks
+        while True:
+            item = self._encode_queue.get()
+            if item is None:
+                return
+            path, frame = item
+            if self._error is not None:
+                self.buffers.release(frame)
+                continue
+            try:
+                ok, encoded = cv2.imencode(self._ext, frame, self._params)
+                self.buffers.release(frame)
+                if not ok:
+                    raise RuntimeError(f"Failed to encode frame: {path}")
+                self._write_queue.put((path, encoded.tobytes()))
+            except Exception as e:
+                self._error = e
+                
+    def _write_stage(self):
+        while True:
+            item = self._write_queue.get()
+            if item is None:
+                return
+            if self._error is not None:
+                continue
+            try:
+                self._writer.write(*item)
+            except Exception as e:
+                self._error = e
+
+
 class FrameExtractorThread(QThread):
     """Background thread for extracting frames"""
     
@@ -93,13 +548,39 @@ class FrameExtractorThread(QThread):
     finished = pyqtSignal(int)
     error = pyqtSignal(str)
     
-    def __init__(self, video_path, output_dir, interval_seconds, frames_per_second, roi=None):
+    # Forward gap (in frames) beyond which seeking beats decoding through;
+    # roughly two GOPs for typical H.264/H.265 encodes
+    SEEK_THRESHOLD = 250
+    
+    def __init__(self, video_path, output_dir, interval_seconds, frames_per_second, roi=None,
+                 decoder="cpu", image_format="jpg", quality=85, output_mode="files",
+                 processes=1):
         super().__init__()
         self.video_path = video_path
         self.output_dir = output_dir
         self.interval_seconds = interval_seconds
         self.frames_per_second = frames_per_second
         self.roi = roi  # (x, y, width, height) in pixel coordinates
+        self.decoder = decoder  # "cpu" (OpenCV), "pyav" or "nvdec"
+        self.image_format = image_format  # "jpg", "png" or "webp"
+        self.quality = quality  # 1-100, used by JPEG and WebP
+        self.output_mode = output_mode  # "files", "zip" or "tar"
+        # Decoding worker processes; only used for image files on the CPU decoder
+        self.processes = processes
+        self._cancel = threading.Event()
+        self._worker_cancel = None  # shared with worker processes while they run
+        
+    def cancel(self):
+        """Ask the extraction to stop after the frame in progress.
+        
+        Frames already handed to the encoders are still written in full, so
+        no partial files are left behind.
+        """
+        self._cancel.set()
+        # The extractor thread clears _worker_cancel when its pool finishes
+        worker_cancel = self._worker_cancel
+        if worker_cancel is not None:
+            worker_cancel.set()
         
     def run(self):
         try:
@@ -118,62 +599,275 @@ class FrameExtractorThread(QThread):
             if self.roi:
                 roi_x, roi_y, roi_w, roi_h = self.roi
                 # Ensure ROI is within video bounds
-                roi_x = max(0, min(roi_x, video_width - 1))
-                roi_y = max(0, min(roi_y, video_height - 1))
-                roi_w = min(roi_w, video_width - roi_x)
-                roi_h = min(roi_h, video_height - roi_y)
+                roi_x, roi_y, roi_w, roi_h = RectangleSelector._clamp_rect(
+                    roi_x, roi_y, roi_x + roi_w, roi_y + roi_h, video_width, video_height
+                )
             else:
                 roi_x, roi_y, roi_w, roi_h = 0, 0, video_width, video_height
             
+            # The OpenCV capture doubles as the probe for the properties above
+            # and as the fallback when hardware decoding is unavailable
+            cap, cropped = self._open_decoder(cap, (roi_x, roi_y, roi_w, roi_h))
+            
             frame_interval = self.interval_seconds if self.interval_seconds > 0 else video_duration
-            current_time = 0.0
             frame_count = 0
             
             os.makedirs(self.output_dir, exist_ok=True)
+            self._encode_params = self._get_encode_params()
             
-            while current_time < video_duration:
-                # Calculate frame numbers for this interval
-                start_frame = int(current_time * fps)
-                end_frame = int(min((current_time + frame_interval) * fps, total_frames))
-                
-                # Extract frames within this interval
-                frames_in_interval = min(self.frames_per_second * frame_interval, end_frame - start_frame)
-                if frames_in_interval > 0:
-                    frame_indices = np.linspace(start_frame, end_frame - 1, int(frames_in_interval), dtype=int)
-                else:
-                    frame_indices = [start_frame] if start_frame < total_frames else []
-                
-                for idx in frame_indices:
-                    cap.set(cv2.CAP_PROP_POS_FRAMES, idx)
-                    ret, frame = cap.read()
-                    if not ret:
+            # Sample frames_per_second frames for every interval, spread evenly
+            # over the whole video in one sorted pass so it can be walked once
+            # from front to back instead of seeking before each read
+            if video_duration > 0 and frame_interval > 0:
+                intervals = np.ceil(video_duration / frame_interval)
+                total_samples = int(intervals * self.frames_per_second * frame_interval)
+                all_indices = np.unique(np.linspace(0, total_frames - 1, total_samples, dtype=np.int64))
+            else:
+                all_indices = np.empty(0, dtype=np.int64)
+            
+            # Crop in numpy only when the decoder did not already do it
+            crop_roi = None
+            if self.roi and roi_w > 0 and roi_h > 0 and not cropped:
+                crop_roi = (roi_x, roi_y, roi_w, roi_h)
+            
+            if self.processes > 1 and self.output_mode == "files" and isinstance(cap, cv2.VideoCapture):
+                cap.release()
+                frame_count = self._extract_parallel(all_indices, fps, crop_roi)
+                if not self._cancel.is_set():
+                    self.finished.emit(frame_count)
+                return
+            
+            # Decoding stays on this thread while encoding and writing run as
+            # separate pipeline stages (cv2.imencode releases the GIL)
+            with self._open_writer() as writer, \
+                    FramePipeline(writer, f".{self.image_format}", self._encode_params) as pipeline:
+                last_progress = -1
+                frames = self._decode_frames(cap, all_indices, pipeline.buffers, crop_roi)
+                for i, (idx, frame) in enumerate(frames):
+                    if self._cancel.is_set():
                         break
+                    # Save frame
+                    timestamp = idx / fps
+                    frame_filename = f"frame_{frame_count:06d}_t{timestamp:.2f}s.{self.image_format}"
+                    frame_path = os.path.join(self.output_dir, frame_filename)
+                    # The pipeline releases the buffer once it is encoded
+                    pipeline.put(frame_path, frame)
+                    frame_count += 1
                     
-                    # Apply ROI if specified
-                    if self.roi and roi_w > 0 and roi_h > 0:
-                        frame = frame[roi_y:roi_y+roi_h, roi_x:roi_x+roi_w]
-                    
-                    if frame.size > 0:
-                        # Save frame
-                        timestamp = current_time
-                        frame_filename = f"frame_{frame_count:06d}_t{timestamp:.2f}s.jpg"
-                        frame_path = os.path.join(self.output_dir, frame_filename)
-                        cv2.imwrite(frame_path, frame)
-                        frame_count += 1
-                        
-                        # Emit progress
-                        progress = int((current_time / video_duration) * 100) if video_duration > 0 else 0
-                        self.progress.emit(min(progress, 100))
-                
-                current_time += frame_interval
-                if frame_interval <= 0:
-                    break
+                    # Emit progress only when the percentage changes; a
+                    # signal per frame floods the UI event loop
+                    progress = int((i + 1) * 100 / len(all_indices))
+                    if progress != last_progress:
+                        self.progress.emit(progress)
+                        last_progress = progress
                     
             cap.release()
-            self.finished.emit(frame_count)
+            if not self._cancel.is_set():
+                self.finished.emit(frame_count)
             
         except Exception as e:
             self.error.emit(f"Error extracting frames: {str(e)}")
+            
+    def _extract_parallel(self, all_indices, fps, roi):
+        """Decode chunks of all_indices in worker processes.
+        
+        Each worker opens its own capture and seeks once to its chunk, so
+        only frame indices cross the process boundary. Returns the number
+        of frames written.
+        """
+        # Several chunks per process keep progress flowing; each costs one seek
+        chunks = [chunk for chunk in np.array_split(all_indices, self.processes * 4) if len(chunk)]
+        tasks = []
+        first_number = 0
+        for chunk in chunks:
+            tasks.append((self.video_path, chunk, first_number, fps, roi,
+                          self.output_dir, self.image_format, self._encode_params))
+            first_number += len(chunk)
+        
+        frame_count = 0
+        done = 0
+        # Forking a process that runs Qt and worker threads is unsafe, so spawn
+        context = multiprocessing.get_context("spawn")
+        self._worker_cancel = context.Event()
+        try:
+            if self._cancel.is_set():
+                return 0
+            with context.Pool(self.processes, initializer=_init_worker,
+                              initargs=(self._worker_cancel,)) as pool:
+                # Once cancelled, the remaining chunks return without decoding
+                for written, chunk_size in pool.imap_unordered(_extract_chunk, tasks):
+                    frame_count += written
+                    done += chunk_size
+                    self.progress.emit(int(done * 100 / len(all_indices)))
+        finally:
+            self._worker_cancel = None
+        return frame_count
+        
+    def _open_writer(self):
+        """Return the writer for the output mode, preferring io_uring for files"""
+        if self.output_mode == "zip":
+            return ZipWriter(os.path.join(self.output_dir, "frames.zip"))
+        if self.output_mode == "tar":
+            return TarWriter(os.path.join(self.output_dir, "frames.tar"))
+        return self._open_file_writer()
+        
+    @staticmethod
+    def _open_file_writer():
+        """Return an io_uring writer when the system supports one"""
+        if liburing is not None and hasattr(os, "eventfd"):
+            try:
+                return IoUringBatchEngine()
+            except OSError:
+                pass  # io_uring disabled by the kernel or a seccomp policy
+        return FileWriter()
+        
+    def _get_encode_params(self):
+        """Return the cv2.imencode parameters for the chosen image format"""
+        if self.image_format == "png":
+            return []
+        if self.image_format == "webp":
+            return [cv2.IMWRITE_WEBP_QUALITY, self.quality]
+        # Huffman optimisation and progressive scans roughly double encode
+        # time for a few percent smaller files, so keep both off
+        return [cv2.IMWRITE_JPEG_QUALITY, self.quality,
+                cv2.IMWRITE_JPEG_OPTIMIZE, 0,
+                cv2.IMWRITE_JPEG_PROGRESSIVE, 0]
+        
+    def _open_decoder(self, cap, roi):
+        """Swap cap for the requested decoder if it is available and works.
+        
+        Returns (capture, cropped) where cropped tells whether the decoder
+        already applies the ROI itself.
+        """
+        if self.decoder == "pyav" and av is not None:
+            crop_xywh = None
+            x, y, w, h = roi
+            video_width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+            video_height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+            # A small ROI is cropped before the BGR conversion so only its
+            # pixels get converted; for large ones the filter isn't worth it
+            if self.roi and w > 0 and h > 0 and w * h < video_width * video_height / 4:
+                crop_xywh = (x, y, w, h)
+            try:
+                pyav_cap = PyAVCapture(self.video_path, crop_xywh)
+            except (av.FFmpegError, IndexError):  # IndexError: no video stream
+                return cap, False
+            cap.release()
+            return pyav_cap, crop_xywh is not None
+        if self.decoder != "nvdec" or ffmpegcv is None:
+            return cap, False
+        crop_xywh = None
+        if self.roi:
+            # NVDEC crops on even pixel boundaries only
+            x, y, w, h = (v // 2 * 2 for v in roi)
+            if w > 0 and h > 0:
+                crop_xywh = (x, y, w, h)
+        try:
+            nvdec_cap = NvdecCapture(self.video_path, crop_xywh)
+        except Exception:
+            # No CUDA device or ffmpeg built without cuvid - stay on the CPU
+            return cap, False
+        if not nvdec_cap.isOpened():
+            nvdec_cap.release()
+            return cap, False
+        cap.release()
+        return nvdec_cap, crop_xywh is not None
+        
+    @classmethod
+    def _decode_frames(cls, cap, indices, buffers, roi=None):
+        """Yield (index, frame) for each of the ascending frame indices,
+        cropped to roi (x, y, width, height) if given. Stops at end of video.
+        
+        Frames are taken from `buffers` (a FrameBufferPool) and must be
+        released back to it by the consumer once they are no longer needed.
+        """
+        position = 0  # index of the frame the next grab() returns
+        decoded = None  # full-size frame the ROI is copied out of, reused
+        shape = None
+        if roi:
+            # The crop bounds never change, so build them once up front
+            x, y, w, h = roi
+            roi_slice = np.s_[y:y + h, x:x + w]
+        for idx in indices:
+            position = cls._grab_frame(cap, position, int(idx))
+            if position is None:
+                return
+            # Only frames that are actually saved pay for BGR conversion
+            if roi:
+                # Apply ROI: decode into one reused full-size frame and copy
+                # the region out, so nothing is allocated per frame
+                ret, decoded = cap.retrieve(decoded)
+                if not ret:
+                    return
+                region = decoded[roi_slice]
+                frame = buffers.acquire(region.shape)
+                np.copyto(frame, region)
+            else:
+                # The first frame tells the buffer shape; after that OpenCV
+                # decodes straight into pooled buffers
+                buf = buffers.acquire(shape) if shape else None
+                ret, frame = cap.retrieve(buf)
+                if buf is not None and frame is not buf:
+                    buffers.release(buf)
+                if not ret:
+                    return
+                shape = frame.shape
+            yield int(idx), frame
+            
+    @classmethod
+    def _grab_frame(cls, cap, position, target):
+        """Advance cap so frame `target` is grabbed and ready to retrieve.
+        
+        Skipped frames are only grabbed (demuxed and decoded, never converted
+        to BGR). Returns the new position, or None if the video ended first.
+        """
+        # Only seek across long gaps; short ones are cheaper to decode through.
+        # Captures without random access return False and decode through.
+        if target - position > cls.SEEK_THRESHOLD and cap.set(cv2.CAP_PROP_POS_FRAMES, target):
+            position = target
+        while position < target:
+            if not cap.grab():
+                return None
+            position += 1
+        if not cap.grab():
+            return None
+        return position + 1
+
+
+_worker_cancel = None  # multiprocessing.Event set to stop a worker process early
+
+
+def _init_worker(cancel):
+    global _worker_cancel
+    _worker_cancel = cancel
+
+
+def _extract_chunk(task):
+    """Worker process entry point for FrameExtractorThread._extract_parallel.
+    
+    Returns (frames written, number of indices in the chunk).
+    """
+    video_path, indices, first_number, fps, roi, output_dir, image_format, params = task
+    if _worker_cancel is not None and _worker_cancel.is_set():
+        return 0, len(indices)
+    cap = cv2.VideoCapture(video_path)
+    if not cap.isOpened():
+        raise RuntimeError(f"Failed to open video: {video_path}")
+    written = 0
+    try:
+        # Each worker decodes on one core and leaves the rest to its encoders
+        with FrameExtractorThread._open_file_writer() as writer, \
+                FramePipeline(writer, f".{image_format}", params, encoders=2) as pipeline:
+            frames = FrameExtractorThread._decode_frames(cap, indices, pipeline.buffers, roi)
+            for idx, frame in frames:
+                if _worker_cancel is not None and _worker_cancel.is_set():
+                    break
+                frame_filename = f"frame_{first_number + written:06d}_t{idx / fps:.2f}s.{image_format}"
+                pipeline.put(os.path.join(output_dir, frame_filename), frame)
+                written += 1
+    finally:
+        cap.release()
+    return written, len(indices)
 
 
 class VideoFrameExtractor(QMainWindow):
@@ -186,6 +880,9 @@ class VideoFrameExtractor(QMainWindow):
         self.video_duration = 0
         self.display_scale = 1.0
         self.roi = None
+        self._frame_pixmap = None  # unscaled pixmap of the displayed frame
+        self._frame_pixmap_id = None
+        self._scaled_pixmap_key = None  # (frame id, label size) of the label's pixmap
         
         self.init_ui()
         self.timer = QTimer()
@@ -266,6 +963,36 @@ class VideoFrameExtractor(QMainWindow):
         fps_layout.addWidget(self.fps_spin)
         settings_layout.addLayout(fps_layout)
         
+        # Decoding processes
+        processes_layout = QHBoxLayout()
+        processes_layout.addWidget(QLabel("Decode processes:"))
+        self.processes_spin = QSpinBox()
+        self.processes_spin.setMinimum(1)
+        self.processes_spin.setMaximum(os.cpu_count() or 1)
+        # Leave half the cores to the encoder threads
+        self.processes_spin.setValue(max(1, (os.cpu_count() or 1) // 2))
+        self.processes_spin.setToolTip("Parallel decoding applies to image file output with CPU decoding")
+        processes_layout.addWidget(self.processes_spin)
+        settings_layout.addLayout(processes_layout)
+        
+        # Decoder backend
+        decoder_layout = QHBoxLayout()
+        decoder_layout.addWidget(QLabel("Decoder:"))
+        self.decoder_combo = QComboBox()
+        self.decoder_combo.addItem("OpenCV (CPU)", "cpu")
+        self.decoder_combo.addItem("PyAV (CPU)", "pyav")
+        self.decoder_combo.addItem("NVDEC (GPU)", "nvdec")
+        # Disable backends whose optional dependency is missing
+        model = self.decoder_combo.model()
+        if av is None:
+            model.item(1).setEnabled(False)
+            model.item(1).setToolTip("Requires PyAV")
+        if ffmpegcv is None:
+            model.item(2).setEnabled(False)
+            model.item(2).setToolTip("Requires ffmpegcv and an ffmpeg build with NVDEC support")
+        decoder_layout.addWidget(self.decoder_combo)
+        settings_layout.addLayout(decoder_layout)
+        
         settings_group.setLayout(settings_layout)
         right_panel.addWidget(settings_group)
         
@@ -283,6 +1010,37 @@ class VideoFrameExtractor(QMainWindow):
         output_dir_layout.addWidget(self.output_dir_btn)
         output_layout.addLayout(output_dir_layout)
         
+        # Output mode
+        mode_layout = QHBoxLayout()
+        mode_layout.addWidget(QLabel("Save as:"))
+        self.output_mode_combo = QComboBox()
+        self.output_mode_combo.addItem("Image files", "files")
+        self.output_mode_combo.addItem("ZIP archive", "zip")
+        self.output_mode_combo.addItem("TAR archive", "tar")
+        mode_layout.addWidget(self.output_mode_combo)
+        output_layout.addLayout(mode_layout)
+        
+        # Image format
+        format_layout = QHBoxLayout()
+        format_layout.addWidget(QLabel("Image format:"))
+        self.format_combo = QComboBox()
+        self.format_combo.addItem("JPEG", "jpg")
+        self.format_combo.addItem("PNG", "png")
+        self.format_combo.addItem("WebP", "webp")
+        self.format_combo.currentIndexChanged.connect(self.on_format_changed)
+        format_layout.addWidget(self.format_combo)
+        output_layout.addLayout(format_layout)
+        
+        # Quality (JPEG and WebP only; PNG is lossless)
+        quality_layout = QHBoxLayout()
+        quality_layout.addWidget(QLabel("Quality:"))
+        self.quality_spin = QSpinBox()
+        self.quality_spin.setMinimum(1)
+        self.quality_spin.setMaximum(100)
+        self.quality_spin.setValue(85)
+        quality_layout.addWidget(self.quality_spin)
+        output_layout.addLayout(quality_layout)
+        
         output_group.setLayout(output_layout)
         right_panel.addWidget(output_group)
         
@@ -298,6 +1056,8 @@ class VideoFrameExtractor(QMainWindow):
         self.progress_bar.setMinimum(0)
         self.progress_bar.setMaximum(100)
         self.progress_bar.setValue(0)
+        # Skip redrawing the percentage text on every update
+        self.progress_bar.setTextVisible(False)
         right_panel.addWidget(self.progress_bar)
         
         right_panel.addStretch()
@@ -349,27 +1109,47 @@ class VideoFrameExtractor(QMainWindow):
             ret, frame = self.cap.read()
             if ret:
                 self.current_frame = frame
-                self.display_frame(frame)
+                frame_id = (self.video_path, int(self.cap.get(cv2.CAP_PROP_POS_FRAMES)))
+                self.display_frame(frame, frame_id)
             else:
                 self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
                 
-    def display_frame(self, frame):
-        """Display frame in the video label"""
-        height, width, channel = frame.shape
-        bytes_per_line = 3 * width
-        q_img = QImage(frame.data, width, height, bytes_per_line, QImage.Format_RGB888).rgbSwapped()
+    def display_frame(self, frame, frame_id=None):
+        """Display frame in the video label
+        
+        The unscaled and scaled pixmaps are cached by frame_id, so showing the
+        same frame again (e.g. after a resize) skips the conversion work.
+        """
+        label_size = self.video_label.size()
+        scaled_key = (frame_id, label_size.width(), label_size.height())
+        if frame_id is not None and scaled_key == self._scaled_pixmap_key:
+            return
+            
+        if frame_id is None or frame_id != self._frame_pixmap_id:
+            height, width, channel = frame.shape
+            bytes_per_line = 3 * width
+            # Format_BGR888 matches OpenCV's layout, so no channel swap copy
+            q_img = QImage(frame.data, width, height, bytes_per_line, QImage.Format_BGR888)
+            self._frame_pixmap = QPixmap.fromImage(q_img)
+            self._frame_pixmap_id = frame_id
         
         # Scale to fit label while maintaining aspect ratio
-        pixmap = QPixmap.fromImage(q_img)
-        scaled_pixmap = pixmap.scaled(
-            self.video_label.size(), 
+        scaled_pixmap = self._frame_pixmap.scaled(
+            label_size, 
             Qt.KeepAspectRatio, 
             Qt.SmoothTransformation
         )
+        self._scaled_pixmap_key = scaled_key
         
         self.video_label.setPixmap(scaled_pixmap)
         self.video_label.setAlignment(Qt.AlignCenter)
         
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        # The label size is part of the cache key, so this only rescales
+        if self.current_frame is not None:
+            self.display_frame(self.current_frame, self._frame_pixmap_id)
+            
     def on_roi_selected(self, x, y, width, height):
         """Handle ROI selection"""
         # Convert display coordinates to video coordinates
@@ -401,10 +1181,9 @@ class VideoFrameExtractor(QMainWindow):
             roi_h = int(height * scale_y)
             
             # Clamp to video bounds
-            roi_x = max(0, min(roi_x, video_width - 1))
-            roi_y = max(0, min(roi_y, video_height - 1))
-            roi_w = min(roi_w, video_width - roi_x)
-            roi_h = min(roi_h, video_height - roi_y)
+            roi_x, roi_y, roi_w, roi_h = RectangleSelector._clamp_rect(
+                roi_x, roi_y, roi_x + roi_w, roi_y + roi_h, video_width, video_height
+            )
             
             self.roi = (roi_x, roi_y, roi_w, roi_h)
             self.clear_roi_btn.setEnabled(True)
@@ -414,6 +1193,9 @@ class VideoFrameExtractor(QMainWindow):
         self.video_label.clear_selection()
         self.clear_roi_btn.setEnabled(False)
         
+    def on_format_changed(self, index):
+        self.quality_spin.setEnabled(self.format_combo.itemData(index) != "png")
+        
     def select_output_dir(self):
         directory = QFileDialog.getExistingDirectory(self, "Select Output Directory")
         if directory:
@@ -442,7 +1224,12 @@ class VideoFrameExtractor(QMainWindow):
             output_dir, 
             interval_seconds, 
             frames_per_second,
-            self.roi
+            self.roi,
+            decoder=self.decoder_combo.currentData(),
+            image_format=self.format_combo.currentData(),
+            quality=self.quality_spin.value(),
+            output_mode=self.output_mode_combo.currentData(),
+            processes=self.processes_spin.value()
         )
         self.extractor_thread.progress.connect(self.progress_bar.setValue)
         self.extractor_thread.finished.connect(self.on_extraction_finished)
@@ -466,7 +1253,10 @@ class VideoFrameExtractor(QMainWindow):
         if hasattr(self, 'cap') and self.cap is not None:
             self.cap.release()
         if hasattr(self, 'extractor_thread') and self.extractor_thread.isRunning():
-            self.extractor_thread.terminate()
+            # Let the thread stop between frames instead of killing it mid-write
+            self.extractor_thread.cancel()
+            # No timeout: worker processes can take a few seconds to wind
+            # down, and the QThread must not be destroyed while it runs
             self.extractor_thread.wait()
         event.accept()
 